@@ -1,108 +1,178 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
-df = pd.read_csv("generated_products.csv")
-
-#passed vs rejected
-status_counts = df['passed_inspection'].value_counts()
-plt.figure(figsize=(6, 5))
-bars = plt.bar(status_counts.index.astype(str), status_counts.values)
-plt.xlabel("Inspection Result")
-plt.ylabel("Number of Fabric Pieces")
-plt.title("Fabric Inspection Outcome")
-plt.grid(axis='y', linestyle='--', alpha=0.6)
-
-for bar in bars:
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2, height,
-             f'{int(height)}', ha='center', va='bottom')
-plt.tight_layout()
-plt.show()
-
-#pie chart
-status_counts = df['passed_inspection'].value_counts()
-
-plt.figure(figsize=(6, 6))
-plt.pie(
-    status_counts.values,
-    labels=status_counts.index.astype(str),
-    autopct='%1.1f%%',
-    startangle=90,
-    colors=['skyblue', 'yellow']
-)
-plt.title("Fabric Inspection Result (Pass vs Reject)")
-plt.tight_layout()
-plt.show()
-
-#defect score distribution histogram
-plt.figure(figsize=(7, 5))
-plt.hist(df['raw_defect_score'], bins=15)
-plt.xlabel("Defect Score")
-plt.ylabel("Frequency")
-plt.title("Histogram of Fabric Defect Scores")
-plt.tight_layout()
-plt.show()
-
-#defect vs production order
-sorted_df = df.sort_values("line_sequence")
-reduced_df = sorted_df.iloc[::10]
-
-plt.figure(figsize=(8, 5))
-plt.bar(
-    range(len(reduced_df)),
-    reduced_df['raw_defect_score'],
-    color='orange'
-)
-plt.xlabel("Sampled Production Items")
-plt.ylabel("Defect Score")
-plt.title("Defect Scores Across Sampled Production Items")
-plt.tight_layout()
-plt.show()
-
-#Weight vs Defect Score
-plt.figure(figsize=(7, 5))
-plt.scatter(df['weight_g'], df['raw_defect_score'])
-plt.xlabel("Fabric Weight (grams)")
-plt.ylabel("Defect Score")
-plt.title("Weight vs Defect Score Relationship")
-plt.tight_layout()
-plt.show()
-
-#Rejection reasons
-reasons = df['rejection_reason'].dropna().value_counts()
-
-plt.figure(figsize=(7, 5))
-plt.bar(reasons.index, reasons.values)
-plt.xlabel("Defect Type")
-plt.ylabel("Count")
-plt.title("Reasons for Fabric Rejection")
-plt.xticks(rotation=30)
-plt.tight_layout()
-plt.show()
-
-#stacked bar-Pass vs Reject per Product Line
-line_status = df.groupby(['product_line', 'passed_inspection']).size().unstack(fill_value=0)
-
-plt.figure(figsize=(8, 5))
-plt.bar(line_status.index, line_status[True], label="Passed")
-plt.bar(line_status.index, line_status[False],
-        bottom=line_status[True], label="Rejected")
-
-plt.xlabel("Product Line")
-plt.ylabel("Count")
-plt.title("Pass vs Reject per Production Line")
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-#BOX PLOT — Defect Score by Size
-sizes = df['size'].unique()
-data = [df[df['size'] == s]['raw_defect_score'] for s in sizes]
-
-plt.figure(figsize=(7, 5))
-plt.boxplot(data, labels=sizes)
-plt.xlabel("Fabric Size")
-plt.ylabel("Defect Score")
-plt.title("Defect Score Distribution by Size")
-plt.tight_layout()
-plt.show()
+"""
+FlowTex Analytics - inspection charts for generated production data
+Optional: needs pandas and matplotlib (pip install -r requirements-analytics.txt).
+Both are imported only when a chart is drawn, so importing this module is cheap.
+
+Usage: python Graphs.py [generated_products.csv]
+"""
+
+import sys
+
+
+def _require(module_name):
+    """Import an analytics dependency on first use"""
+    import importlib
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise ImportError(
+            f"{module_name} is required for analytics charts; "
+            "install it with: pip install -r requirements-analytics.txt"
+        ) from None
+
+
+def load_products(path="generated_products.csv"):
+    """Read a generated products CSV into a DataFrame"""
+    pd = _require('pandas')
+    return pd.read_csv(path)
+
+
+def plot_inspection_outcome(df):
+    """Bar chart of passed vs rejected pieces"""
+    plt = _require('matplotlib.pyplot')
+    status_counts = df['passed_inspection'].value_counts()
+    plt.figure(figsize=(6, 5))
+    bars = plt.bar(status_counts.index.astype(str), status_counts.values)
+    plt.xlabel("Inspection Result")
+    plt.ylabel("Number of Fabric Pieces")
+    plt.title("Fabric Inspection Outcome")
+    plt.grid(axis='y', linestyle='--', alpha=0.6)
+
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2, height,
+                 f'{int(height)}', ha='center', va='bottom')
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_inspection_share(df):
+    """Pie chart of passed vs rejected pieces"""
+    plt = _require('matplotlib.pyplot')
+    status_counts = df['passed_inspection'].value_counts()
+
+    plt.figure(figsize=(6, 6))
+    plt.pie(
+        status_counts.values,
+        labels=status_counts.index.astype(str),
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=['skyblue', 'yellow']
+    )
+    plt.title("Fabric Inspection Result (Pass vs Reject)")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_defect_histogram(df):
+    """Histogram of defect scores"""
+    plt = _require('matplotlib.pyplot')
+    plt.figure(figsize=(7, 5))
+    plt.hist(df['raw_defect_score'], bins=15)
+    plt.xlabel("Defect Score")
+    plt.ylabel("Frequency")
+    plt.title("Histogram of Fabric Defect Scores")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_defect_by_order(df):
+    """Defect scores across sampled production order"""
+    plt = _require('matplotlib.pyplot')
+    sorted_df = df.sort_values("line_sequence")
+    reduced_df = sorted_df.iloc[::10]
+
+    plt.figure(figsize=(8, 5))
+    plt.bar(
+        range(len(reduced_df)),
+        reduced_df['raw_defect_score'],
+        color='orange'
+    )
+    plt.xlabel("Sampled Production Items")
+    plt.ylabel("Defect Score")
+    plt.title("Defect Scores Across Sampled Production Items")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_weight_vs_defect(df):
+    """Scatter of weight against defect score"""
+    plt = _require('matplotlib.pyplot')
+    plt.figure(figsize=(7, 5))
+    plt.scatter(df['weight_g'], df['raw_defect_score'])
+    plt.xlabel("Fabric Weight (grams)")
+    plt.ylabel("Defect Score")
+    plt.title("Weight vs Defect Score Relationship")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_rejection_reasons(df):
+    """Bar chart of rejection reasons"""
+    plt = _require('matplotlib.pyplot')
+    reasons = df['rejection_reason'].dropna().value_counts()
+
+    plt.figure(figsize=(7, 5))
+    plt.bar(reasons.index, reasons.values)
+    plt.xlabel("Defect Type")
+    plt.ylabel("Count")
+    plt.title("Reasons for Fabric Rejection")
+    plt.xticks(rotation=30)
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_line_pass_reject(df):
+    """Stacked pass/reject bars per product line"""
+    plt = _require('matplotlib.pyplot')
+    line_status = df.groupby(['product_line', 'passed_inspection']).size().unstack(fill_value=0)
+
+    plt.figure(figsize=(8, 5))
+    plt.bar(line_status.index, line_status[True], label="Passed")
+    plt.bar(line_status.index, line_status[False],
+            bottom=line_status[True], label="Rejected")
+
+    plt.xlabel("Product Line")
+    plt.ylabel("Count")
+    plt.title("Pass vs Reject per Production Line")
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_defect_by_size(df):
+    """Box plot of defect score by size"""
+    plt = _require('matplotlib.pyplot')
+    sizes = df['size'].unique()
+    data = [df[df['size'] == s]['raw_defect_score'] for s in sizes]
+
+    plt.figure(figsize=(7, 5))
+    plt.boxplot(data, labels=sizes)
+    plt.xlabel("Fabric Size")
+    plt.ylabel("Defect Score")
+    plt.title("Defect Score Distribution by Size")
+    plt.tight_layout()
+    plt.show()
+
+
+CHARTS = [
+    plot_inspection_outcome,
+    plot_inspection_share,
+    plot_defect_histogram,
+    plot_defect_by_order,
+    plot_weight_vs_defect,
+    plot_rejection_reasons,
+    plot_line_pass_reject,
+    plot_defect_by_size,
+]
+
+
+def main(path="generated_products.csv"):
+    """Draw every chart for the given CSV"""
+    df = load_products(path)
+    for chart in CHARTS:
+        chart(df)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
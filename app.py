@@ -3,40 +3,161 @@ FlowTex Factory Simulator - Flask Application
 Main web application for factory simulation
 """
 
+import functools
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash
+import threading
+import uuid
+from flask import (Flask, Response, current_app, render_template, request, redirect,
+                   url_for, flash, make_response, session)
+from flask.helpers import get_debug_flag
 from werkzeug.utils import secure_filename
-from factory_simulator import FactorySimulator
+from render_cache import RenderCache
 
-app = Flask(__name__)
-app.secret_key = 'flowtex_factory_simulator_secret_key_2024'
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['ALLOWED_EXTENSIONS'] = {'csv'}
+_factory_lock = threading.Lock()
 
-# Create uploads directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Distinguishes ETags across restarts, when state_version starts over
+_BOOT_ID = uuid.uuid4().hex[:8]
 
-# Global factory simulator instance
-factory = FactorySimulator()
+
+def create_app(config=None):
+    """Build the Flask app; the factory simulator is created on first use
+    
+    With INGEST_PATH set the simulator is created right away instead, so
+    the feed is tailed without waiting for a request.
+    """
+    app = Flask(__name__)
+    app.secret_key = 'flowtex_factory_simulator_secret_key_2024'
+    app.config['UPLOAD_FOLDER'] = 'uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['ALLOWED_EXTENSIONS'] = {'csv'}
+    
+    # Continuous ingest: a directory of CSV fragments or a single growing CSV.
+    # Each process has its own simulator, so serve with one worker process
+    app.config['INGEST_PATH'] = os.environ.get('FLOWTEX_INGEST_PATH')
+    app.config['INGEST_POLL_INTERVAL'] = 2.0  # seconds
+    app.config['INGEST_HIGH_WATER_MARKS'] = {'Line A': 5000, 'Line B': 5000, 'Line C': 5000}
+    
+    # Line queue and rejection stack bounds (None = unbounded)
+    app.config['QUEUE_CAPACITY'] = None
+    app.config['QUEUE_OVERFLOW_POLICY'] = 'block'  # block, drop_oldest, spill or reject
+    app.config['REJECTION_CAPACITY'] = 1000  # newest rejections kept in memory
+    app.config['REJECTION_OVERFLOW_POLICY'] = 'spill'  # spill or drop_oldest
+    app.config['BLOCK_TIMEOUT'] = 5.0  # seconds a blocked enqueue waits before giving up
+    app.config['SPILL_FOLDER'] = 'spill'
+    app.config['REJECTED_PER_PAGE'] = 50
+    app.config['RENDER_CACHE_SIZE'] = 64  # rendered pages kept per process
+    
+    if config:
+        app.config.update(config)
+    
+    app.extensions['flowtex_render_cache'] = RenderCache(app.config['RENDER_CACHE_SIZE'])
+    
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/upload', view_func=upload_file, methods=['POST'])
+    app.add_url_rule('/queues', view_func=queues)
+    app.add_url_rule('/process', view_func=process)
+    app.add_url_rule('/rejected', view_func=rejected)
+    app.add_url_rule('/accepted', view_func=accepted)
+    app.add_url_rule('/sort', view_func=sort, methods=['GET', 'POST'])
+    
+    if app.config['INGEST_PATH'] and not _is_reloader_parent():
+        with app.app_context():
+            get_factory()
+    return app
+
+
+def _is_reloader_parent():
+    """Check if this process only watches files for werkzeug's reloader
+    
+    The reloader re-runs the app in a child process, which is the one
+    that serves requests and so the only one that should ingest.
+    """
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        return False
+    return __name__ == '__main__' or get_debug_flag()
+
+
+def get_factory():
+    """Get the current app's factory simulator, creating it on first use"""
+    factory = current_app.extensions.get('flowtex_factory')
+    if factory is None:
+        with _factory_lock:
+            factory = current_app.extensions.get('flowtex_factory')
+            if factory is None:
+                from factory_simulator import FactorySimulator
+                config = current_app.config
+                factory = FactorySimulator(
+                    queue_capacity=config['QUEUE_CAPACITY'],
+                    queue_overflow_policy=config['QUEUE_OVERFLOW_POLICY'],
+                    rejection_capacity=config['REJECTION_CAPACITY'],
+                    rejection_overflow_policy=config['REJECTION_OVERFLOW_POLICY'],
+                    block_timeout=config['BLOCK_TIMEOUT'],
+                    spill_dir=config['SPILL_FOLDER']
+                )
+                current_app.extensions['flowtex_factory'] = factory
+                current_app.extensions['flowtex_ingest'] = start_ingest(current_app, factory)
+    return factory
+
+
+def start_ingest(app, factory):
+    """Start tailing the configured ingest path, if any"""
+    if not app.config['INGEST_PATH']:
+        return None
+    from ingest import TailingIngest
+    ingest = TailingIngest(factory, app.config['INGEST_PATH'],
+                           high_water_marks=app.config['INGEST_HIGH_WATER_MARKS'])
+    ingest.start(poll_interval=app.config['INGEST_POLL_INTERVAL'])
+    return ingest
+
+
+def cached_view(view):
+    """Serve a read-only view with a state-version ETag and render cache
+    
+    Pages are cached per factory state_version, so polling clients get a
+    304 or a cached page until a load or process changes the state.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Pending flash messages are rendered into the page; don't cache them
+        if request.method != 'GET' or session.get('_flashes'):
+            return view(*args, **kwargs)
+        
+        version = get_factory().state_version
+        etag = f"{_BOOT_ID}-{version}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            cache = current_app.extensions['flowtex_render_cache']
+            key = (request.endpoint, request.query_string)
+            html = cache.get(key, version)
+            if html is None:
+                html = view(*args, **kwargs)
+                cache.put(key, version, html)
+            response = make_response(html)
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
 
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 
-@app.route('/')
+@cached_view
 def index():
     """Dashboard - Main page"""
+    factory = get_factory()
     stats = factory.get_statistics()
     return render_template('index.html', stats=stats)
 
 
-@app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle CSV file upload"""
+    factory = get_factory()
     if 'file' not in request.files:
         flash('No file part', 'error')
         return redirect(url_for('index'))
@@ -49,7 +170,8 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
         # Load CSV into factory
@@ -72,25 +194,25 @@ def upload_file():
         return redirect(url_for('index'))
 
 
-@app.route('/queues')
+@cached_view
 def queues():
     """View all product line queues"""
-    line_a_items = factory.line_a_queue.display()
-    line_b_items = factory.line_b_queue.display()
-    line_c_items = factory.line_c_queue.display()
+    factory = get_factory()
+    lines = {}
+    for name, queue in (('line_a', factory.line_a_queue),
+                        ('line_b', factory.line_b_queue),
+                        ('line_c', factory.line_c_queue)):
+        # Show the in-memory head; items spilled to disk are only counted
+        lines[name] = queue.page(0, queue.occupancy())
+        lines[name + '_size'] = queue.size()
+        lines[name + '_on_disk'] = queue.size() - len(lines[name])
     
-    return render_template('queues.html',
-                         line_a=line_a_items,
-                         line_b=line_b_items,
-                         line_c=line_c_items,
-                         line_a_size=factory.line_a_queue.size(),
-                         line_b_size=factory.line_b_queue.size(),
-                         line_c_size=factory.line_c_queue.size())
+    return render_template('queues.html', **lines)
 
 
-@app.route('/process')
 def process():
     """Process one item from each queue"""
+    factory = get_factory()
     processed = factory.process_queues()
     
     if processed:
@@ -105,20 +227,33 @@ def process():
     return redirect(url_for('queues'))
 
 
-@app.route('/rejected')
+@cached_view
 def rejected():
-    """View rejected products stack"""
-    rejected_items = factory.rejection_stack.display()  # Already reversed to show top first
+    """View rejected products stack, one page at a time from the top"""
+    factory = get_factory()
+    per_page = current_app.config['REJECTED_PER_PAGE']
     stack_size = factory.rejection_stack.size()
+    total_pages = max(1, (stack_size + per_page - 1) // per_page)
+    page = min(max(request.args.get('page', 1, type=int), 1), total_pages)
+    
+    start = (page - 1) * per_page
+    rejected_items = factory.rejection_stack.page(start, per_page)
+    reason_counts = sorted(factory.rejection_stack.count_by_reason().items(),
+                           key=lambda item: item[1], reverse=True)
     
     return render_template('rejected.html',
                          rejected=rejected_items,
-                         stack_size=stack_size)
+                         stack_size=stack_size,
+                         reason_counts=reason_counts,
+                         page=page,
+                         total_pages=total_pages,
+                         start=start)
 
 
-@app.route('/accepted')
+@cached_view
 def accepted():
     """View accepted products (linked lists)"""
+    factory = get_factory()
     line_a_accepted = factory.line_a_accepted.display()
     line_b_accepted = factory.line_b_accepted.display()
     line_c_accepted = factory.line_c_accepted.display()
@@ -132,9 +267,10 @@ def accepted():
                          line_c_size=factory.line_c_accepted.size())
 
 
-@app.route('/sort', methods=['GET', 'POST'])
+@cached_view
 def sort():
     """Sort products page"""
+    factory = get_factory()
     sortable_fields = [
         ('product_id', 'Product ID'),
         ('weight_g', 'Weight (grams)'),
@@ -176,6 +312,11 @@ def sort():
                          selected_field=selected_field)
 
 
+# Module-level app for 'flask --app app run', 'gunicorn app:app' and
+# 'from app import app'; the simulator inside it is still created lazily
+app = create_app()
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,98 @@
+"""
+Import-time benchmark for FlowTex Factory Simulator
+Imports each module under `python -X importtime` in a fresh interpreter and
+reports the best (minimum) import cost, excluding modules loaded at interpreter
+startup, in a baseline checkout (the first commit by default) and in the
+working tree. Flask dominates the cost of importing app, so deltas of a
+few milliseconds there are run-to-run noise.
+
+Usage: python benchmarks/import_time.py [--repeat N] [--baseline REV]
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['app', 'Graphs', 'src.generate_products']
+
+
+def top_level_imports(statement, cwd=ROOT):
+    """Run statement under -X importtime; map top-level module -> cumulative us"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Nested imports are indented below their importer
+        if name.startswith(' ') and not name.startswith('  '):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def measure(statement, startup, repeat, cwd=ROOT):
+    """Get the best import cost of statement in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        modules = top_level_imports(statement, cwd)
+        if modules is None:
+            return None
+        samples.append(sum(us for name, us in modules.items() if name not in startup))
+    return min(samples) / 1000
+
+
+def first_commit():
+    """Get the root commit of the current branch"""
+    result = subprocess.run(
+        ['git', 'rev-list', '--max-parents=0', 'HEAD'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()[-1]
+
+
+def export_tree(rev, directory):
+    """Write the files of commit rev into directory"""
+    archive = subprocess.run(
+        ['git', 'archive', '--format=tar', rev],
+        cwd=ROOT, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import times.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per statement (best is reported).")
+    parser.add_argument('--baseline', type=str, default=None, help="Commit to compare against (default: the first commit).")
+    args = parser.parse_args()
+
+    baseline = args.baseline or first_commit()
+    startup = top_level_imports('pass') or {}
+
+    with tempfile.TemporaryDirectory(prefix='flowtex_baseline_') as baseline_dir:
+        export_tree(baseline, baseline_dir)
+
+        print(f"{'module':24} {'baseline ms':>12} {'current ms':>12} {'saved ms':>10}")
+        for module in MODULES:
+            statement = f'import {module}'
+            before_ms = measure(statement, startup, args.repeat, baseline_dir)
+            after_ms = measure(statement, startup, args.repeat)
+            if before_ms is None or after_ms is None:
+                print(f"{module:24} {'n/a (missing dependency)':>36}")
+                continue
+            print(f"{module:24} {before_ms:12.1f} {after_ms:12.1f} {before_ms - after_ms:10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -3,75 +3,398 @@ Data Structures for FlowTex Factory Simulator
 Custom implementations of Queue, Stack, and Linked List
 """
 
+import json
+import os
+import tempfile
+import threading
+from array import array
+from collections import deque
 
-class Queue:
-    """FIFO (First In First Out) Queue implementation"""
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'spill', 'reject')
+
+
+class SpillFile:
+    """Append-only file of JSON lines holding overflow items on disk"""
     
-    def __init__(self):
-        self.items = []
+    # Records read from the front are rewritten away once they take up at
+    # least this many bytes and more than the live records do
+    COMPACT_BYTES = 1024 * 1024
     
-    def enqueue(self, item):
-        """Add item to the end of the queue"""
-        self.items.append(item)
+    def __init__(self, directory=None):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._file = self._new_file()
+        self.offsets = array('q')  # Start offset of every record
+        self.head = 0  # Index of the first record not yet read back
+        self.end = 0
     
-    def dequeue(self):
-        """Remove and return item from the front of the queue"""
-        if self.is_empty():
+    def __len__(self):
+        return len(self.offsets) - self.head
+    
+    def append(self, item):
+        """Write item after the last record"""
+        data = json.dumps(item).encode('utf-8') + b'\n'
+        self._file.seek(self.end)
+        self._file.write(data)
+        self.offsets.append(self.end)
+        self.end += len(data)
+    
+    def popleft(self):
+        """Remove and return the oldest record"""
+        if len(self) == 0:
+            return None
+        start = self.offsets[self.head]
+        stop = self.offsets[self.head + 1] if self.head + 1 < len(self.offsets) else self.end
+        item = self._read(start, stop)
+        self.head += 1
+        
+        if len(self) == 0:
+            self.clear()
+        else:
+            consumed = self.offsets[self.head]
+            if consumed >= self.COMPACT_BYTES and consumed > self.end - consumed:
+                self._compact()
+            elif self.head > len(self.offsets) // 2:
+                # Drop consumed offsets; the bytes go at the next compaction
+                self.offsets = self.offsets[self.head:]
+                self.head = 0
+        return item
+    
+    def pop(self):
+        """Remove and return the newest record"""
+        if len(self) == 0:
+            return None
+        start = self.offsets.pop()
+        item = self._read(start, self.end)
+        self.end = start
+        self._file.truncate(start)
+        
+        if len(self) == 0:
+            self.clear()
+        return item
+    
+    def get(self, index):
+        """Read the record at index (0 is the oldest) without removing it"""
+        position = self.head + index
+        stop = self.offsets[position + 1] if position + 1 < len(self.offsets) else self.end
+        return self._read(self.offsets[position], stop)
+    
+    def items(self):
+        """Get all records, oldest first"""
+        return [self.get(i) for i in range(len(self))]
+    
+    def clear(self):
+        """Discard every record and reclaim the file space"""
+        self.offsets = array('q')
+        self.head = 0
+        self.end = 0
+        self._file.truncate(0)
+    
+    def close(self):
+        """Close and delete the spill file"""
+        self._file.close()
+    
+    def _new_file(self):
+        # Anonymous temporary file: removed automatically when closed
+        return tempfile.TemporaryFile(prefix='flowtex_spill_', suffix='.jsonl', dir=self.directory)
+    
+    def _compact(self):
+        """Rewrite the live records to a fresh file, so disk use follows the backlog"""
+        consumed = self.offsets[self.head]
+        new_file = self._new_file()
+        self._file.seek(consumed)
+        while True:
+            block = self._file.read(1024 * 1024)
+            if not block:
+                break
+            new_file.write(block)
+        self._file.close()
+        self._file = new_file
+        self.offsets = array('q', (offset - consumed for offset in self.offsets[self.head:]))
+        self.head = 0
+        self.end -= consumed
+    
+    def _read(self, start, stop):
+        self._file.seek(start)
+        return json.loads(self._file.read(stop - start))
+
+
+class _BoundedContainer:
+    """Shared capacity and overflow handling for Queue and Stack"""
+    
+    def __init__(self, capacity=None, overflow_policy='block', block_timeout=None, spill_dir=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"Capacity must be None or at least 1: {capacity}")
+        self.items = deque()
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.spill_dir = spill_dir
+        self.spill = None
+        
+        # Overflow counters
+        self.blocked = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.rejected = 0
+        
+        self._not_full = threading.Condition()
+    
+    def _is_full(self):
+        return self.capacity is not None and len(self.items) >= self.capacity
+    
+    def _spilled_count(self):
+        return len(self.spill) if self.spill is not None else 0
+    
+    def _make_room(self, block=True):
+        """Apply the overflow policy; return False if the item must be refused
+        
+        Each overflow is counted once: blocked if a wait freed up space,
+        rejected if the item was refused (including a wait that timed out).
+        """
+        if self.overflow_policy == 'reject':
+            self.rejected += 1
+            return False
+        
+        if self.overflow_policy == 'block':
+            if not block or not self._not_full.wait_for(lambda: not self._is_full(), self.block_timeout):
+                self.rejected += 1
+                return False
+            self.blocked += 1
+            return True
+        
+        if self.overflow_policy == 'drop_oldest':
+            self._drop_oldest()
+            self.dropped += 1
+            return True
+        
+        # spill
+        self._open_spill().append(self.items.popleft())
+        self.spilled += 1
+        return True
+    
+    def _drop_oldest(self):
+        self.items.popleft()
+    
+    def _open_spill(self):
+        if self.spill is None:
+            self.spill = SpillFile(self.spill_dir)
+        return self.spill
+    
+    def free_space(self):
+        """Get how many more items fit in memory (None if unbounded)"""
+        if self.capacity is None:
             return None
-        return self.items.pop(0)
+        return max(0, self.capacity - len(self.items))
     
     def is_empty(self):
-        """Check if queue is empty"""
-        return len(self.items) == 0
+        """Check if the container is empty"""
+        return self.size() == 0
     
     def size(self):
-        """Get the number of items in the queue"""
+        """Get the number of items, including any spilled to disk"""
+        return len(self.items) + self._spilled_count()
+    
+    def occupancy(self):
+        """Get the number of items held in memory"""
         return len(self.items)
     
+    def overflow_stats(self):
+        """Get occupancy and overflow counters"""
+        return {
+            'occupancy': len(self.items),
+            'capacity': self.capacity,
+            'policy': self.overflow_policy,
+            'on_disk': self._spilled_count(),
+            'blocked': self.blocked,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'rejected': self.rejected
+        }
+
+
+class Queue(_BoundedContainer):
+    """FIFO (First In First Out) Queue implementation
+    
+    With a capacity set, overflow is handled by the overflow policy:
+    block until space frees up, drop the oldest item, spill new items
+    to disk, or reject the item.
+    """
+    
+    def enqueue(self, item, block=True):
+        """Add item to the end of the queue; return False if it was refused
+        
+        With block=False the block policy refuses at once instead of waiting.
+        """
+        with self._not_full:
+            # Once spilling has started, new items go behind the spilled ones
+            if self._spilled_count() or (self._is_full() and self.overflow_policy == 'spill'):
+                self._open_spill().append(item)
+                self.spilled += 1
+                return True
+            
+            if self._is_full() and not self._make_room(block):
+                return False
+            
+            self.items.append(item)
+            return True
+    
+    def dequeue(self):
+        """Remove and return item from the front of the queue"""
+        with self._not_full:
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            
+            # Refill memory from disk in arrival order
+            if self._spilled_count():
+                self.items.append(self.spill.popleft())
+            
+            self._not_full.notify()
+            return item
+    
+    def page(self, start, count):
+        """Get count items starting start positions behind the front
+        
+        Only the requested items are read; entries spilled to disk are
+        read by offset rather than loading the whole spill file.
+        """
+        with self._not_full:
+            hot = len(self.items)
+            stop = min(start + count, self.size())
+            items = []
+            for position in range(max(start, 0), stop):
+                if position < hot:
+                    items.append(self.items[position])
+                else:
+                    items.append(self.spill.get(position - hot))
+            return items
+    
     def display(self):
         """Get all items in the queue (without removing them)"""
-        return self.items.copy()
+        return self.page(0, self.size())
     
     def peek(self):
         """View the front item without removing it"""
-        if self.is_empty():
+        if not self.items:
             return None
         return self.items[0]
 
 
-class Stack:
-    """LIFO (Last In First Out) Stack implementation"""
+class Stack(_BoundedContainer):
+    """LIFO (Last In First Out) Stack implementation
     
-    def __init__(self):
-        self.items = []
+    With a capacity set, the top items stay in memory; the overflow
+    policy decides whether the bottom item is dropped or spilled to
+    disk, or whether push blocks or rejects.
+    """
     
-    def push(self, item):
-        """Add item to the top of the stack"""
-        self.items.append(item)
+    def push(self, item, block=True):
+        """Add item to the top of the stack; return False if it was refused"""
+        with self._not_full:
+            if self._is_full() and not self._make_room(block):
+                return False
+            self.items.append(item)
+            return True
     
     def pop(self):
         """Remove and return item from the top of the stack"""
-        if self.is_empty():
-            return None
-        return self.items.pop()
-    
-    def is_empty(self):
-        """Check if stack is empty"""
-        return len(self.items) == 0
+        with self._not_full:
+            if not self.items:
+                return None
+            item = self.items.pop()
+            
+            # Keep the top of the stack in memory
+            if self._spilled_count():
+                self.items.appendleft(self.spill.pop())
+            
+            self._not_full.notify()
+            return item
     
     def peek(self):
         """View the top item without removing it"""
-        if self.is_empty():
+        if not self.items:
             return None
         return self.items[-1]
     
-    def size(self):
-        """Get the number of items in the stack"""
-        return len(self.items)
+    def top(self, k):
+        """Get the top k items (from top to bottom)"""
+        return self.page(0, k)
+    
+    def page(self, start, count):
+        """Get count items starting start positions below the top
+        
+        Only the requested items are read; entries spilled to disk are
+        read by offset rather than loading the whole spill file.
+        """
+        with self._not_full:
+            hot = len(self.items)
+            stop = min(start + count, self.size())
+            items = []
+            for position in range(max(start, 0), stop):
+                if position < hot:
+                    items.append(self.items[hot - 1 - position])
+                else:
+                    items.append(self.spill.get(len(self.spill) - 1 - (position - hot)))
+            return items
     
     def display(self):
         """Get all items in the stack (from top to bottom)"""
-        return self.items.copy()[::-1]  # Return reversed to show top first
+        return self.page(0, self.size())
+
+
+class RejectionArchive(Stack):
+    """Rejection stack with a hot in-memory top and a disk archive below
+    
+    The newest hot_size rejections stay in memory; older ones are spilled
+    to an append-only segment file. Counts per rejection_reason are kept
+    up to date so summaries never have to scan the archive.
+    """
+    
+    # Nothing pops the archive, so policies that refuse a push would lose
+    # the product (reject) or stall processing (block)
+    POLICIES = ('spill', 'drop_oldest')
+    
+    def __init__(self, hot_size=1000, overflow_policy='spill', block_timeout=None, spill_dir=None):
+        if overflow_policy not in self.POLICIES:
+            raise ValueError(f"Rejection archive overflow policy must be spill or drop_oldest, not {overflow_policy}")
+        super().__init__(hot_size, overflow_policy, block_timeout, spill_dir)
+        self.reason_counts = {}
+    
+    def push(self, item):
+        """Add a rejected product to the top of the archive"""
+        # The condition's lock is reentrant: counts change with the items
+        with self._not_full:
+            if not super().push(item):
+                return False
+            self._count(item, 1)
+            return True
+    
+    def pop(self):
+        """Remove and return the most recently rejected product"""
+        with self._not_full:
+            item = super().pop()
+            if item is not None:
+                self._count(item, -1)
+            return item
+    
+    def count_by_reason(self):
+        """Get the number of archived rejections per rejection_reason"""
+        with self._not_full:
+            return dict(self.reason_counts)
+    
+    def _drop_oldest(self):
+        self._count(self.items.popleft(), -1)
+    
+    def _count(self, item, delta):
+        reason = item.get('rejection_reason') or 'N/A'
+        self.reason_counts[reason] = self.reason_counts.get(reason, 0) + delta
+        if self.reason_counts[reason] <= 0:
+            del self.reason_counts[reason]
 
 
 class Node:
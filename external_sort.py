@@ -0,0 +1,183 @@
+"""
+External Merge Sort for FlowTex Factory Simulator
+Sorts product archives larger than RAM: bounded-size runs are sorted in
+worker processes and spilled to temporary files, then streamed back
+through a k-way heap merge
+
+Usage: python external_sort.py INPUT.csv --field raw_defect_score --out sorted.csv
+"""
+
+import csv
+import heapq
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from factory_simulator import FactorySimulator, get_field_value, sort_key
+
+SORTABLE_FIELDS = ['product_id', 'weight_g', 'production_timestamp', 'raw_defect_score']
+
+# Rough in-memory size of one parsed product dict, used to size runs
+ROW_BYTES = 1024
+
+# Most rows pickled together in one block of a run file; smaller budgets
+# use smaller blocks so the merge stays within memory_mb
+BLOCK_ROWS = 1000
+
+
+def _product_key(field):
+    """Build the sort key for products by field"""
+    return lambda product: sort_key(get_field_value(product, field))
+
+
+def _write_run(rows, tmp_dir, block_rows=BLOCK_ROWS):
+    """Stream already-sorted rows to a new run file and return its path"""
+    rows = iter(rows)
+    fd, path = tempfile.mkstemp(prefix='run_', suffix='.pkl', dir=tmp_dir)
+    with os.fdopen(fd, 'wb') as file:
+        while True:
+            block = list(islice(rows, block_rows))
+            if not block:
+                break
+            pickle.dump(block, file, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _sort_run(rows, field, tmp_dir, block_rows):
+    """Sort one run and spill it to disk (runs in a worker process)"""
+    rows.sort(key=_product_key(field))
+    return _write_run(rows, tmp_dir, block_rows)
+
+
+def _read_run(path):
+    """Stream rows back from a run file, deleting it once exhausted"""
+    try:
+        with open(path, 'rb') as file:
+            while True:
+                try:
+                    block = pickle.load(file)
+                except EOFError:
+                    break
+                yield from block
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _merge_runs(paths, field):
+    """k-way heap merge of sorted run files; stable across runs"""
+    return heapq.merge(*(_read_run(path) for path in paths), key=_product_key(field))
+
+
+def _sort_into_runs(products, field, run_rows, block_rows, workers, tmp_dir):
+    """Split products into sorted run files, return their paths in input order"""
+    products = iter(products)
+    paths = []
+
+    if workers <= 1:
+        while True:
+            rows = list(islice(products, run_rows))
+            if not rows:
+                break
+            paths.append(_sort_run(rows, field, tmp_dir, block_rows))
+        return paths
+
+    # spawn rather than fork: the caller may be a threaded server whose
+    # locks would be copied into the children while held
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = []
+        while True:
+            rows = list(islice(products, run_rows))
+            if not rows:
+                break
+            pending.append(pool.submit(_sort_run, rows, field, tmp_dir, block_rows))
+            del rows
+
+            # Keep at most one run per worker in flight to respect the budget
+            if len(pending) >= workers:
+                paths.append(pending.pop(0).result())
+        paths.extend(future.result() for future in pending)
+    return paths
+
+
+def external_sort(products, field, memory_mb=256, workers=None, tmp_dir=None, max_fan_in=64):
+    """Sort an iterable of products by field, yielding them in order
+
+    Uses roughly memory_mb of RAM regardless of input size. Runs are sorted
+    in up to `workers` processes (all CPUs by default, 1 = in-process); at
+    most max_fan_in run files are merged at once, with extra merge passes
+    when there are more.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    budget_rows = max(1, (memory_mb * 1024 * 1024) // ROW_BYTES)
+
+    # Each worker holds a run plus the copy being sent to it, and the
+    # main process fills the next one
+    run_rows = max(100, budget_rows // (2 * workers + 1))
+
+    # The merge holds one decoded block per open run: fan_in * block_rows
+    # rows must fit the budget
+    block_rows = max(1, min(BLOCK_ROWS, budget_rows // max_fan_in))
+    fan_in = max(2, min(max_fan_in, budget_rows // block_rows))
+
+    with tempfile.TemporaryDirectory(prefix='flowtex_sort_', dir=tmp_dir) as run_dir:
+        paths = _sort_into_runs(products, field, run_rows, block_rows, workers, run_dir)
+
+        # Merge in passes until one heap merge can take every run
+        while len(paths) > fan_in:
+            merged = []
+            for start in range(0, len(paths), fan_in):
+                group = paths[start:start + fan_in]
+                merged.append(_write_run(_merge_runs(group, field), run_dir, block_rows)
+                              if len(group) > 1 else group[0])
+            paths = merged
+
+        yield from _merge_runs(paths, field)
+
+
+def read_products(path):
+    """Stream typed products from a CSV file"""
+    parse_product = FactorySimulator().parse_product
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            yield parse_product(row)
+
+
+def sort_csv(in_path, out_path, field, memory_mb=256, workers=None, tmp_dir=None):
+    """Sort a products CSV into a new CSV file; return the number of rows"""
+    count = 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as file:
+        writer = None
+        for product in external_sort(read_products(in_path), field, memory_mb, workers, tmp_dir):
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(product.keys()))
+                writer.writeheader()
+            writer.writerow(product)
+            count += 1
+    return count
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Sort a products CSV larger than memory.")
+    parser.add_argument("input", help="Products CSV to sort.")
+    parser.add_argument("--field", choices=SORTABLE_FIELDS, default="raw_defect_score", help="Field to sort by.")
+    parser.add_argument("--out", type=str, required=True, help="Output CSV path.")
+    parser.add_argument("--memory-mb", type=int, default=256, help="Approximate memory budget in MB.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for sorting runs (default: all CPUs).")
+    parser.add_argument("--tmp-dir", type=str, default=None, help="Directory for temporary run files.")
+    args = parser.parse_args()
+
+    count = sort_csv(args.input, args.out, args.field, args.memory_mb, args.workers, args.tmp_dir)
+    print(f"Sorted {count} rows by {args.field} into: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,70 +4,135 @@ Handles product processing, queues, stacks, and sorting
 """
 
 import csv
+import threading
 from datetime import datetime
-from data_structures import Queue, Stack, LinkedList
+from data_structures import Queue, RejectionArchive, LinkedList
+
+
+def get_field_value(product, field):
+    """Extract field value from product"""
+    value = product.get(field, '')
+    
+    # Handle datetime strings
+    if field == 'production_timestamp' and isinstance(value, str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except:
+            try:
+                return datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
+            except:
+                return value
+    
+    return value
+
+
+def sort_key(value):
+    """Sort key shared by merge_sort and the external sort
+    
+    Values of one type compare naturally; mixed types are ordered numbers,
+    datetimes, strings (anything else as its str()), then None. E.g. a
+    timestamp that fails to parse sorts after all the parsed ones.
+    """
+    if value is None:
+        return (3, '')
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, datetime):
+        return (1, value)
+    return (2, str(value))
 
 
 class FactorySimulator:
     """Simulates factory production line operations"""
     
-    def __init__(self):
+    def __init__(self, queue_capacity=None, queue_overflow_policy='block',
+                 rejection_capacity=1000, rejection_overflow_policy='spill',
+                 block_timeout=5.0, spill_dir=None):
         # Three queues for three product lines
-        self.line_a_queue = Queue()
-        self.line_b_queue = Queue()
-        self.line_c_queue = Queue()
+        self.line_a_queue = Queue(queue_capacity, queue_overflow_policy, block_timeout, spill_dir)
+        self.line_b_queue = Queue(queue_capacity, queue_overflow_policy, block_timeout, spill_dir)
+        self.line_c_queue = Queue(queue_capacity, queue_overflow_policy, block_timeout, spill_dir)
         
-        # Stack for rejected products
-        self.rejection_stack = Stack()
+        # Stack for rejected products: newest in memory, older spilled to disk
+        self.rejection_stack = RejectionArchive(rejection_capacity, rejection_overflow_policy, block_timeout, spill_dir)
         
         # Linked lists for accepted products per line
         self.line_a_accepted = LinkedList()
         self.line_b_accepted = LinkedList()
         self.line_c_accepted = LinkedList()
         
-        # Track all products for sorting
-        self.all_products = []
+        # Count of products taken into the line queues
+        self.total_products = 0
+        
+        # Increases on every change to queues, stack, lists or their
+        # overflow counters; bumped by request and ingest threads alike.
+        # _version_lock also guards total_products
+        self.state_version = 0
+        self._version_lock = threading.Lock()
     
     def load_from_csv(self, filepath):
         """Load products from CSV file and populate queues"""
         try:
             with open(filepath, 'r', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
-                
-                for row in reader:
-                    # Convert data types
-                    product = {
-                        'product_id': row.get('product_id', ''),
-                        'product_line': row.get('product_line', ''),
-                        'batch_id': row.get('batch_id', ''),
-                        'line_sequence': int(row.get('line_sequence', 0)) if row.get('line_sequence') else 0,
-                        'size': row.get('size', ''),
-                        'color': row.get('color', ''),
-                        'weight_g': float(row.get('weight_g', 0)) if row.get('weight_g') else 0.0,
-                        'production_timestamp': row.get('production_timestamp', ''),
-                        'raw_defect_score': float(row.get('raw_defect_score', 0)) if row.get('raw_defect_score') else 0.0,
-                        'inspected': row.get('inspected', '').lower() == 'true',
-                        'passed_inspection': row.get('passed_inspection', '').lower() == 'true',
-                        'rejection_reason': row.get('rejection_reason', '')
-                    }
-                    
-                    # Add to appropriate queue based on product line
-                    if product['product_line'] == 'Line A':
-                        self.line_a_queue.enqueue(product)
-                    elif product['product_line'] == 'Line B':
-                        self.line_b_queue.enqueue(product)
-                    elif product['product_line'] == 'Line C':
-                        self.line_c_queue.enqueue(product)
-                    
-                    # Store in all products for sorting
-                    self.all_products.append(product)
+                products = [self.parse_product(row) for row in reader]
+            
+            # Reject the whole upload rather than queue part of it or block
+            # the request waiting for space
+            incoming = {}
+            for product in products:
+                incoming[product['product_line']] = incoming.get(product['product_line'], 0) + 1
+            for line, count in incoming.items():
+                queue = self.get_queue(line)
+                if queue and queue.overflow_policy in ('reject', 'block'):
+                    free = queue.free_space()
+                    if free is not None and count > free:
+                        return False, f"Upload rejected: {line} queue has room for {free} products, upload has {count}"
             
-            return True, f"Loaded {len(self.all_products)} products"
+            refused = 0
+            for product in products:
+                if not self.enqueue_product(product):
+                    refused += 1
+            
+            if refused:
+                return True, f"Loaded {self.total_products} products ({refused} not queued: line queues full)"
+            return True, f"Loaded {self.total_products} products"
         except FileNotFoundError:
             return False, "CSV file not found"
         except Exception as e:
             return False, f"Error loading CSV: {str(e)}"
     
+    def parse_product(self, row):
+        """Convert a raw CSV row into a typed product record"""
+        product = {
+            'product_id': row.get('product_id', ''),
+            'product_line': row.get('product_line', ''),
+            'batch_id': row.get('batch_id', ''),
+            'line_sequence': int(row.get('line_sequence', 0)) if row.get('line_sequence') else 0,
+            'size': row.get('size', ''),
+            'color': row.get('color', ''),
+            'weight_g': float(row.get('weight_g', 0)) if row.get('weight_g') else 0.0,
+            'production_timestamp': row.get('production_timestamp', ''),
+            'raw_defect_score': float(row.get('raw_defect_score', 0)) if row.get('raw_defect_score') else 0.0,
+            'inspected': row.get('inspected', '').lower() == 'true',
+            'passed_inspection': row.get('passed_inspection', '').lower() == 'true',
+            'rejection_reason': row.get('rejection_reason', '')
+        }
+        return product
+    
+    def enqueue_product(self, product, block=False):
+        """Add a product to its line queue; return False if it was refused
+        
+        Only background producers such as the ingest loop should pass
+        block=True; request handlers must never wait for queue space.
+        """
+        queue = self.get_queue(product['product_line'])
+        accepted = queue is None or queue.enqueue(product, block)
+        
+        # A refusal still changes the queue's overflow counters
+        self._bump_state_version(new_products=1 if accepted else 0)
+        return accepted
+    
     def get_queue(self, line_name):
         """Get queue for a specific line"""
         if line_name == 'Line A':
@@ -122,8 +187,16 @@ class FactorySimulator:
                     self.handle_acceptance(product, 'Line C')
                 processed.append(('Line C', product))
         
+        if processed:
+            self._bump_state_version()
         return processed
     
+    def _bump_state_version(self, new_products=0):
+        """Mark the simulator state as changed, counting any new products"""
+        with self._version_lock:
+            self.total_products += new_products
+            self.state_version += 1
+    
     def handle_rejection(self, product):
         """Push rejected product to rejection stack"""
         self.rejection_stack.push(product)
@@ -135,84 +208,69 @@ class FactorySimulator:
             accepted_list.append(product)
     
     def merge_sort(self, arr, field):
-        """Merge sort implementation for sorting products by field"""
-        if len(arr) <= 1:
-            return arr
+        """Merge sort implementation for sorting products by field
+        
+        Field values are extracted once, and merging goes through a single
+        auxiliary buffer instead of allocating new lists at every level.
+        """
+        values = [sort_key(self._get_field_value(product, field)) for product in arr]
+        order = list(range(len(arr)))
+        self._merge_sort_range(order, order.copy(), values, 0, len(arr))
+        return [arr[i] for i in order]
+    
+    def _merge_sort_range(self, order, aux, values, lo, hi):
+        """Sort order[lo:hi] (indices into values) in place"""
+        if hi - lo <= 1:
+            return
         
         # Divide
-        mid = len(arr) // 2
-        left = self.merge_sort(arr[:mid], field)
-        right = self.merge_sort(arr[mid:], field)
+        mid = (lo + hi) // 2
+        self._merge_sort_range(order, aux, values, lo, mid)
+        self._merge_sort_range(order, aux, values, mid, hi)
         
         # Conquer and merge
-        return self._merge(left, right, field)
+        self._merge(order, aux, values, lo, mid, hi)
     
-    def _merge(self, left, right, field):
-        """Merge two sorted arrays"""
-        result = []
-        i = j = 0
+    def _merge(self, order, aux, values, lo, mid, hi):
+        """Merge the sorted runs order[lo:mid] and order[mid:hi]"""
+        aux[lo:hi] = order[lo:hi]
+        i, j, k = lo, mid, lo
         
-        while i < len(left) and j < len(right):
-            left_val = self._get_field_value(left[i], field)
-            right_val = self._get_field_value(right[j], field)
-            
-            # Compare based on data type
-            if self._compare_values(left_val, right_val):
-                result.append(left[i])
+        while i < mid and j < hi:
+            # Keys from sort_key order mixed types consistently
+            if values[aux[i]] <= values[aux[j]]:
+                order[k] = aux[i]
                 i += 1
             else:
-                result.append(right[j])
+                order[k] = aux[j]
                 j += 1
+            k += 1
         
-        # Add remaining elements
-        result.extend(left[i:])
-        result.extend(right[j:])
-        
-        return result
+        # Add remaining left elements; remaining right ones are already in place
+        order[k:k + mid - i] = aux[i:mid]
     
     def _get_field_value(self, product, field):
         """Extract field value from product"""
-        value = product.get(field, '')
-        
-        # Handle datetime strings
-        if field == 'production_timestamp' and isinstance(value, str):
-            try:
-                return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-            except:
-                try:
-                    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
-                except:
-                    return value
-        
-        return value
+        return get_field_value(product, field)
     
     def _compare_values(self, left, right):
-        """Compare two values (handles different types)"""
-        # Handle None values
-        if left is None:
-            return False
-        if right is None:
-            return True
-        
-        # Handle datetime objects
-        if isinstance(left, datetime) and isinstance(right, datetime):
-            return left <= right
-        
-        # Handle numeric types
-        if isinstance(left, (int, float)) and isinstance(right, (int, float)):
-            return left <= right
-        
-        # Handle strings
-        if isinstance(left, str) and isinstance(right, str):
-            return left <= right
-        
-        # Fallback to string comparison
-        return str(left) <= str(right)
-    
-    def sort_products(self, products, field, algorithm='merge'):
-        """Sort products by specified field using merge sort"""
+        """Compare two values (handles different types, see sort_key)"""
+        return sort_key(left) <= sort_key(right)
+    
+    def sort_products(self, products, field, algorithm='merge', memory_mb=256, workers=1):
+        """Sort products by specified field using merge sort
+        
+        algorithm='external' sorts out of core within memory_mb (see
+        external_sort.py); products may then be any iterable, and a
+        generator is returned so the sorted output is never held in
+        memory either. It sorts in-process by default; pass workers > 1
+        for worker processes.
+        """
         if algorithm == 'merge':
             return self.merge_sort(products.copy(), field)
+        elif algorithm == 'external':
+            from external_sort import external_sort
+            return external_sort(products, field, memory_mb=memory_mb, workers=workers)
         else:
             return products.copy()
     
@@ -232,7 +290,7 @@ class FactorySimulator:
         total_processed = total_rejected + total_accepted
         
         return {
-            'total_products': len(self.all_products),
+            'total_products': self.total_products,
             'in_queues': total_in_queues,
             'processed': total_processed,
             'rejected': total_rejected,
@@ -242,6 +300,10 @@ class FactorySimulator:
             'line_c_queue': self.line_c_queue.size(),
             'line_a_accepted': self.line_a_accepted.size(),
             'line_b_accepted': self.line_b_accepted.size(),
-            'line_c_accepted': self.line_c_accepted.size()
+            'line_c_accepted': self.line_c_accepted.size(),
+            'line_a_overflow': self.line_a_queue.overflow_stats(),
+            'line_b_overflow': self.line_b_queue.overflow_stats(),
+            'line_c_overflow': self.line_c_queue.overflow_stats(),
+            'rejection_overflow': self.rejection_stack.overflow_stats()
         }
 
@@ -0,0 +1,258 @@
+"""
+Tailing Ingest for FlowTex Factory Simulator
+Watches a directory of CSV fragments (or tails a single growing CSV)
+and feeds new rows into the factory line queues continuously
+"""
+
+import csv
+import fnmatch
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _is_valid_utf8(values):
+    """Check that no field holds bytes that failed to decode as UTF-8"""
+    try:
+        for value in values:
+            value.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class TailingIngest:
+    """Incrementally load CSV rows into a FactorySimulator
+    
+    Only the bytes appended since the last recorded offset are parsed.
+    Offsets are persisted to a JSON file so a restart resumes where the
+    previous run stopped instead of reprocessing old rows.
+    """
+    
+    def __init__(self, factory, path, pattern='*.csv', offsets_path=None,
+                 high_water_marks=None, chunk_size=1024 * 1024):
+        self.factory = factory
+        self.path = path
+        self.pattern = pattern
+        self.chunk_size = chunk_size
+        
+        # Per-line queue sizes above which ingest pauses (backpressure)
+        self.high_water_marks = high_water_marks or {}
+        
+        if offsets_path is None:
+            if os.path.isdir(path):
+                offsets_path = os.path.join(path, '.flowtex_offsets.json')
+            else:
+                offsets_path = path + '.offsets.json'
+        self.offsets_path = offsets_path
+        self.offsets = self._load_offsets()
+        
+        self.rows_ingested = 0
+        self.bad_rows = 0
+        self.paused = False
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _load_offsets(self):
+        """Read persisted offsets from disk"""
+        try:
+            with open(self.offsets_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_offsets(self):
+        """Atomically write offsets to disk"""
+        tmp_path = self.offsets_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.offsets, file)
+        os.replace(tmp_path, self.offsets_path)
+    
+    def _source_files(self):
+        """Get the CSV files to read, oldest name first"""
+        if not os.path.isdir(self.path):
+            return [self.path] if os.path.exists(self.path) else []
+        
+        names = sorted(
+            name for name in os.listdir(self.path)
+            if fnmatch.fnmatch(name, self.pattern)
+        )
+        return [os.path.join(self.path, name) for name in names]
+    
+    def _is_backpressured(self, line_name):
+        """Check if the queue for a line is above its high-water mark"""
+        limit = self.high_water_marks.get(line_name)
+        if limit is None:
+            return False
+        queue = self.factory.get_queue(line_name)
+        return queue is not None and queue.size() >= limit
+    
+    def _read_file(self, filepath):
+        """Ingest new complete records from one file
+        
+        Returns False if ingest stopped early because of backpressure.
+        """
+        key = os.path.abspath(filepath)
+        state = self.offsets.get(key, {'offset': 0, 'header': None})
+        
+        try:
+            file_size = os.path.getsize(filepath)
+        except OSError:
+            return True
+        
+        # File was truncated or replaced - start over
+        if file_size < state['offset']:
+            state = {'offset': 0, 'header': None}
+        
+        # Progress is recorded in place, so it survives an early exit
+        self.offsets[key] = state
+        
+        if file_size == state['offset']:
+            return True
+        
+        window = self.chunk_size
+        with open(filepath, 'rb') as file:
+            while state['offset'] < file_size:
+                file.seek(state['offset'])
+                chunk = file.read(window)
+                
+                # Only parse complete lines; a trailing partial line waits
+                end = chunk.rfind(b'\n')
+                if end == -1:
+                    if state['offset'] + len(chunk) >= file_size:
+                        break
+                    # Line longer than the window - retry with a bigger one
+                    window *= 2
+                    continue
+                chunk = chunk[:end + 1]
+                
+                start = state['offset']
+                if not self._read_records(chunk, state):
+                    return False
+                
+                if state['offset'] == start:
+                    # A quoted field spans past the window end
+                    if start + len(chunk) >= file_size:
+                        break
+                    window *= 2
+                else:
+                    window = self.chunk_size
+        
+        return True
+    
+    def _read_records(self, chunk, state):
+        """Ingest the CSV records in chunk, advancing state['offset'] per record
+        
+        Quoted fields may contain newlines. A record cut off at the end of
+        the chunk is left for a later read. Returns False on backpressure.
+        """
+        consumed = [0]
+        
+        def lines():
+            for line in chunk.splitlines(keepends=True):
+                consumed[0] += len(line)
+                # Invalid bytes are kept as surrogates and caught per record
+                yield line.decode('utf-8', 'surrogateescape')
+        
+        reader = csv.reader(lines())
+        record_start = 0
+        while True:
+            try:
+                values = next(reader)
+            except StopIteration:
+                break
+            except csv.Error:
+                # Skip records the csv module cannot parse
+                values = None
+            record_end = consumed[0]
+            
+            # An odd number of quotes means the record is not complete yet
+            if values is not None and chunk.count(b'"', record_start, record_end) % 2:
+                break
+            
+            if values is None or not _is_valid_utf8(values):
+                self.bad_rows += 1
+                state['offset'] += record_end - record_start
+                record_start = record_end
+                continue
+            
+            if not values:
+                state['offset'] += record_end - record_start
+                record_start = record_end
+                continue
+            
+            if state['header'] is None:
+                state['header'] = values
+                state['offset'] += record_end - record_start
+                record_start = record_end
+                continue
+            
+            row = dict(zip(state['header'], values))
+            if self._is_backpressured(row.get('product_line', '')):
+                return False
+            
+            try:
+                product = self.factory.parse_product(row)
+            except (ValueError, TypeError, AttributeError):
+                # Skip malformed rows rather than stall the feed
+                self.bad_rows += 1
+            else:
+                # Queue stayed full - retry this record on a later poll
+                if not self.factory.enqueue_product(product, block=True):
+                    return False
+                self.rows_ingested += 1
+            
+            state['offset'] += record_end - record_start
+            record_start = record_end
+        return True
+    
+    def poll_once(self):
+        """Ingest everything new across the watched files
+        
+        Returns the number of rows ingested by this poll.
+        """
+        before = self.rows_ingested
+        files = self._source_files()
+        
+        self.paused = False
+        try:
+            for filepath in files:
+                if not self._read_file(filepath):
+                    self.paused = True
+                    break
+            
+            # Forget offsets for fragments that have been removed
+            known = {os.path.abspath(filepath) for filepath in files}
+            for key in list(self.offsets):
+                if key not in known:
+                    del self.offsets[key]
+        finally:
+            self._save_offsets()
+        return self.rows_ingested - before
+    
+    def run(self, poll_interval=1.0):
+        """Poll until stop() is called"""
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Ingest poll failed")
+            self._stop_event.wait(poll_interval)
+    
+    def start(self, poll_interval=1.0):
+        """Run the ingest loop in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(poll_interval,), daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background ingest loop"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
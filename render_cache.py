@@ -0,0 +1,53 @@
+"""
+Render Cache for FlowTex Factory Simulator
+LRU cache of rendered pages keyed by view and arguments, valid for one factory state version
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Thread-safe LRU cache for rendered fragments
+    
+    Each key holds only the value for the version it was rendered at, so
+    pages from older versions are replaced rather than piling up.
+    """
+    
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, version):
+        """Get the value cached for key at version (None if missing or stale)"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                # A stale page can never be served again - free it now
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, version, value):
+        """Store the value for key at version, evicting least recently used entries"""
+        with self._lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove every cached value"""
+        with self._lock:
+            self.entries.clear()
+    
+    def size(self):
+        """Get the number of cached values"""
+        return len(self.entries)
@@ -1,9 +1,10 @@
 # src/generate_products.py
-import csv
 import random
-import argparse
 from datetime import datetime, timedelta
 
+# csv and argparse are imported where used, so importing this module
+# for generate_products() stays cheap
+
 # Configuration: allowed values & simple rules
 PRODUCT_LINES = ["Line A", "Line B", "Line C"]
 SIZE_DISTR = {"XS": 0.05, "S": 0.20, "M": 0.50, "L": 0.20, "XL": 0.05}
@@ -79,6 +80,7 @@ def write_csv(products, out_path):
     if not products:
         print("No products to write.")
         return
+    import csv
     keys = list(products[0].keys())
     with open(out_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=keys)
@@ -88,6 +90,7 @@ def write_csv(products, out_path):
     print(f"Wrote {len(products)} rows to: {out_path}")
 
 def main():
+    import argparse
     parser = argparse.ArgumentParser(description="Generate T-shirt factory dataset.")
     parser.add_argument("--n", type=int, default=1000, help="Number of products to generate.")
     parser.add_argument("--out", type=str, default="data/generated_products.csv", help="Output CSV path.")
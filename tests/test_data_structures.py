@@ -0,0 +1,81 @@
+"""Tests for the bounded queue and stack against a plain list model"""
+
+import random
+
+import pytest
+
+from data_structures import Queue, SpillFile, Stack
+
+
+def test_queue_spill_keeps_fifo_order(tmp_path):
+    queue = Queue(capacity=4, overflow_policy='spill', spill_dir=str(tmp_path))
+    model = []
+    rng = random.Random(1)
+
+    for item in range(500):
+        queue.enqueue({'n': item})
+        model.append({'n': item})
+        while model and rng.random() < 0.4:
+            assert queue.dequeue() == model.pop(0)
+        assert queue.size() == len(model)
+        assert queue.occupancy() <= 4
+
+    assert queue.display() == model
+    while model:
+        assert queue.dequeue() == model.pop(0)
+    assert queue.dequeue() is None
+
+
+def test_stack_spill_keeps_lifo_order(tmp_path):
+    stack = Stack(capacity=4, overflow_policy='spill', spill_dir=str(tmp_path))
+    model = []
+    rng = random.Random(2)
+
+    for item in range(500):
+        stack.push({'n': item})
+        model.append({'n': item})
+        while model and rng.random() < 0.4:
+            assert stack.pop() == model.pop()
+        assert stack.size() == len(model)
+
+    assert stack.display() == model[::-1]
+    while model:
+        assert stack.pop() == model.pop()
+    assert stack.pop() is None
+
+
+@pytest.mark.parametrize('start,count', [(0, 3), (2, 5), (3, 10), (10, 4), (18, 10), (25, 3)])
+def test_page_matches_list_model(tmp_path, start, count):
+    queue = Queue(capacity=5, overflow_policy='spill', spill_dir=str(tmp_path))
+    stack = Stack(capacity=5, overflow_policy='spill', spill_dir=str(tmp_path))
+    items = [{'n': item} for item in range(20)]
+    for item in items:
+        queue.enqueue(item)
+        stack.push(item)
+
+    assert queue.page(start, count) == items[start:start + count]
+    assert stack.page(start, count) == items[::-1][start:start + count]
+
+
+def test_spill_file_compacts_while_backlog_persists(tmp_path, monkeypatch):
+    monkeypatch.setattr(SpillFile, 'COMPACT_BYTES', 4096)
+    queue = Queue(capacity=2, overflow_policy='spill', spill_dir=str(tmp_path))
+    model = []
+
+    for item in range(3000):
+        queue.enqueue({'n': item, 'pad': 'x' * 50})
+        model.append({'n': item, 'pad': 'x' * 50})
+        if len(model) > 50:
+            assert queue.dequeue() == model.pop(0)
+
+    # Consumed records were rewritten away instead of piling up on disk
+    assert queue.spill.end < 2 * 4096
+    assert queue.display() == model
+
+
+@pytest.mark.parametrize('capacity', [0, -1])
+def test_capacity_below_one_is_rejected(capacity):
+    with pytest.raises(ValueError):
+        Queue(capacity=capacity)
+    with pytest.raises(ValueError):
+        Stack(capacity=capacity, overflow_policy='drop_oldest')
@@ -0,0 +1,40 @@
+"""Tests for the external merge sort"""
+
+import pytest
+
+import external_sort
+from factory_simulator import get_field_value, sort_key
+from src.generate_products import generate_products
+
+
+@pytest.fixture(scope='module')
+def products():
+    return generate_products(3000)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('field', ['raw_defect_score', 'production_timestamp'])
+def test_matches_sorted(products, tmp_path, monkeypatch, workers, field):
+    merges = []
+    merge_runs = external_sort._merge_runs
+
+    def counting_merge_runs(paths, field):
+        merges.append(len(paths))
+        return merge_runs(paths, field)
+
+    monkeypatch.setattr(external_sort, '_merge_runs', counting_merge_runs)
+
+    # 1 MB gives runs of a few hundred rows; a fan-in of 2 then needs
+    # several merge passes
+    result = list(external_sort.external_sort(
+        iter(products), field, memory_mb=1, workers=workers,
+        tmp_dir=str(tmp_path), max_fan_in=2
+    ))
+
+    expected = sorted(products, key=lambda product: sort_key(get_field_value(product, field)))
+    assert result == expected
+    assert len(merges) > 2
+    assert max(merges) <= 2
+
+    # Run files are removed once merged
+    assert list(tmp_path.iterdir()) == []
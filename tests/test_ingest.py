@@ -0,0 +1,78 @@
+"""Tests for the tailing CSV ingest"""
+
+from factory_simulator import FactorySimulator
+from ingest import TailingIngest
+
+HEADER = b'product_id,product_line,weight_g,rejection_reason\n'
+
+
+def make_ingest(tmp_path):
+    factory = FactorySimulator()
+    return factory, TailingIngest(factory, str(tmp_path))
+
+
+def append(path, data):
+    with open(path, 'ab') as file:
+        file.write(data)
+
+
+def queued_ids(factory):
+    return [product['product_id'] for product in factory.line_a_queue.display()]
+
+
+def test_partial_trailing_line_waits_for_the_rest(tmp_path):
+    path = tmp_path / 'feed.csv'
+    append(path, HEADER + b'P1,Line A,10.5,\nP2,Li')
+    factory, ingest = make_ingest(tmp_path)
+
+    assert ingest.poll_once() == 1
+    assert queued_ids(factory) == ['P1']
+
+    append(path, b'ne A,11.0,\n')
+    assert ingest.poll_once() == 1
+    assert queued_ids(factory) == ['P1', 'P2']
+
+
+def test_quoted_newline_is_one_record(tmp_path):
+    path = tmp_path / 'feed.csv'
+    append(path, HEADER + b'P1,Line A,10.5,"first line\n')
+    factory, ingest = make_ingest(tmp_path)
+
+    # The quoted field is still open, so nothing is taken yet
+    assert ingest.poll_once() == 0
+
+    append(path, b'second line"\nP2,Line A,11.0,\n')
+    assert ingest.poll_once() == 2
+    products = factory.line_a_queue.display()
+    assert products[0]['rejection_reason'] == 'first line\nsecond line'
+    assert [product['product_id'] for product in products] == ['P1', 'P2']
+
+
+def test_bad_rows_are_counted_and_skipped(tmp_path):
+    path = tmp_path / 'feed.csv'
+    append(path, HEADER + b'P1,Line A,not a number,\n'
+                        + b'P2,Line A,\xff\xfe,\n'
+                        + b'P3,Line A,12.0,\n')
+    factory, ingest = make_ingest(tmp_path)
+
+    assert ingest.poll_once() == 1
+    assert ingest.bad_rows == 2
+    assert queued_ids(factory) == ['P3']
+
+    # The offset moved past the bad rows, so they are not retried
+    assert ingest.poll_once() == 0
+    assert ingest.bad_rows == 2
+
+
+def test_resume_from_persisted_offsets(tmp_path):
+    path = tmp_path / 'feed.csv'
+    append(path, HEADER + b'P1,Line A,10.5,\nP2,Line A,11.0,\n')
+    factory, ingest = make_ingest(tmp_path)
+    assert ingest.poll_once() == 2
+
+    append(path, b'P3,Line A,12.0,\n')
+
+    # A new ingest (as after a restart) only reads what was appended
+    factory, ingest = make_ingest(tmp_path)
+    assert ingest.poll_once() == 1
+    assert queued_ids(factory) == ['P3']